@@ -7,20 +7,56 @@ and potential risk areas using LangGraph and LLMs.
 """
 
 import os
+import time
+import asyncio
 import argparse
+import contextlib
+import orjson
 from dotenv import load_dotenv
-from src.document_loaders.loader import DocumentLoader
-from src.workflow.contract_comparison_workflow import ContractComparisonWorkflow
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
+from src.document_loaders.loader import DocumentLoader, DEFAULT_CACHE_DIR
+from src.workflow.cache import content_key
+from src.workflow.contract_comparison_workflow import ContractComparisonWorkflow, get_workflow_fingerprint
 
 # Load environment variables
 load_dotenv()
 
-def main():
-    """Main entry point for the application."""
+def non_negative_int(value):
+    """Parse a command-line value as an integer that is zero or more."""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value}")
+    return number
+
+@contextlib.contextmanager
+def phase(name):
+    """Print how long a phase of the run took, whether or not it succeeded."""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        print(f"{name} took {(time.perf_counter_ns() - start) / 1e6:.1f} ms")
+
+def read_input_hash(meta_path):
+    """Read the input hash stored next to a report, or return None if there is none."""
+    try:
+        with open(meta_path, 'rb') as f:
+            return orjson.loads(f.read()).get("input_hash")
+    except (OSError, orjson.JSONDecodeError, AttributeError):
+        return None
+
+async def main_async():
+    """Asynchronous entry point for the application."""
     parser = argparse.ArgumentParser(description='Compare two legal documents and identify changes and risks.')
     parser.add_argument('--doc1', type=str, required=True, help='Path to the first document')
     parser.add_argument('--doc2', type=str, required=True, help='Path to the second document')
     parser.add_argument('--output', type=str, default='comparison_report.md', help='Output file path')
+    parser.add_argument('--llm-cache', type=str, default='.cache/llm_cache.db', help='Path of the LLM response cache database')
+    parser.add_argument('--no-llm-cache', action='store_true', help='Disable the LLM response cache')
+    parser.add_argument('--batch', action='store_true', help='Use the discounted Groq Batch API (three batch jobs in a row, up to 24h each, so up to 72h)')
+    parser.add_argument('--max-chars', type=non_negative_int, default=None, help='Only compare the first N characters of each document')
+    parser.add_argument('--skip-unchanged', action='store_true', help='Skip the comparison if the output report was produced from the same inputs')
 
     args = parser.parse_args()
 
@@ -31,36 +67,91 @@ def main():
         print("For Streamlit Cloud deployment, use the secrets.toml approach instead.")
         return
 
+    # Cache LLM responses on disk; the pipeline runs at temperature 0, so re-running
+    # it on the same documents returns the stored responses without any API calls
+    if not args.no_llm_cache:
+        os.makedirs(os.path.dirname(args.llm_cache) or '.', exist_ok=True)
+        set_llm_cache(SQLiteCache(database_path=args.llm_cache))
+
+    workflow = ContractComparisonWorkflow(batch=args.batch)
+
+    # Open the connection to the LLM API while the documents are being loaded. The
+    # warm-up is a billed request, so it is only sent when the response cache is off
+    # and most runs call the API. It is wasted when the documents turn out to have no
+    # textual differences, which is only known once they are loaded; with
+    # --skip-unchanged the run may also end there, so no warm-up is sent at all
+    if args.no_llm_cache and not args.skip_unchanged:
+        warmup = asyncio.create_task(workflow.awarmup())
+    else:
+        warmup = None
+
     print(f"Loading documents: {args.doc1} and {args.doc2}")
 
     # Load documents
     try:
-        loader = DocumentLoader()
-        doc1_content = loader.load_document(args.doc1)
-        doc2_content = loader.load_document(args.doc2)
+        # The CLI compares local files, so their extracted text is cached on disk
+        loader = DocumentLoader(cache_dir=DEFAULT_CACHE_DIR)
+        with phase("Document loading"):
+            doc1_content = await asyncio.to_thread(loader.load_document, args.doc1, max_chars=args.max_chars)
+            doc2_content = await asyncio.to_thread(loader.load_document, args.doc2, max_chars=args.max_chars)
         print("Documents loaded successfully.")
     except Exception as e:
+        if warmup is not None:
+            warmup.cancel()
         print(f"Error loading documents: {e}")
         return
 
+    # Reports are stored with a fingerprint of the inputs and of the workflow that produced them
+    input_hash = content_key(get_workflow_fingerprint(), doc1_content, doc2_content)
+    meta_path = args.output + '.meta'
+    partial_path = args.output + '.partial'
+    if args.skip_unchanged and os.path.exists(args.output) and read_input_hash(meta_path) == input_hash:
+        print(f"Documents and workflow are unchanged; keeping the existing report {args.output}")
+        return
+
+    # A failed warm-up only means the first step opens the connection itself
+    if warmup is not None:
+        try:
+            await warmup
+        except Exception:
+            pass
+
     # Run the workflow
     try:
-        workflow = ContractComparisonWorkflow()
         print("Starting contract comparison workflow...")
-        result = workflow.run(doc1_content, doc2_content)
-        print("Workflow completed successfully.")
 
-        # Extract the summary from the result
-        summary = result["summary"]
+        # Stream the report to a partial file as the summary is generated; the previous
+        # report is only replaced once the new one is complete
+        node_timings = {}
+        with phase("Comparison workflow"), open(partial_path, 'w', buffering=1) as f:
+            async for chunk in workflow.astream_summary(doc1_content, doc2_content, node_timings=node_timings):
+                f.write(chunk)
+                f.flush()
+
+        # Drop the old fingerprint first, so a report whose fingerprint could not be
+        # written is never skipped next time
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.replace(partial_path, args.output)
 
-        # Save the report
-        with open(args.output, 'w') as f:
-            f.write(summary)
+        # Break the workflow time down by step; parallel steps overlap, so they add up to more
+        for name, elapsed_ms in node_timings.items():
+            print(f"  {name} took {elapsed_ms:.1f} ms")
 
+        with open(meta_path, 'wb') as f:
+            f.write(orjson.dumps({"input_hash": input_hash}))
+
+        print("Workflow completed successfully.")
         print(f"Comparison report saved to {args.output}")
     except Exception as e:
         print(f"Error during workflow execution: {e}")
+        if os.path.exists(partial_path):
+            print(f"The incomplete report was left in {partial_path}")
         return
 
+def main():
+    """Main entry point for the application."""
+    asyncio.run(main_async())
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,3 @@
+"""
+Comparison module for the Contract Comparison Application.
+"""
@@ -0,0 +1,74 @@
+"""
+Document Chunking Module
+
+This module splits two versions of an oversized document into aligned chunk pairs,
+so each pair can be compared on its own and stay within the model's context window.
+"""
+
+import difflib
+from typing import List, Tuple
+
+
+# Default maximum size of a chunk, roughly 8k tokens
+DEFAULT_MAX_CHUNK_CHARS = 32000
+
+
+def split_aligned(doc1: str, doc2: str, max_chars: int = DEFAULT_MAX_CHUNK_CHARS) -> List[Tuple[str, str]]:
+    """
+    Split two versions of a document into aligned chunk pairs.
+
+    Chunk boundaries are only placed inside unchanged text, so each pair covers the
+    same part of both documents and every change falls entirely within one pair.
+    A single change larger than max_chars produces a pair that exceeds the limit.
+
+    Args:
+        doc1: Content of the first document
+        doc2: Content of the second document
+        max_chars: Maximum number of characters per chunk
+
+    Returns:
+        A list of (doc1 chunk, doc2 chunk) pairs, in document order
+    """
+    if len(doc1) <= max_chars and len(doc2) <= max_chars:
+        return [(doc1, doc2)]
+
+    lines1 = doc1.splitlines(keepends=True)
+    lines2 = doc2.splitlines(keepends=True)
+    # Keep the default autojunk heuristic: lines repeated throughout a long document
+    # (blank lines, boilerplate) would otherwise make the alignment quadratic
+    matcher = difflib.SequenceMatcher(None, lines1, lines2)
+
+    pairs = []
+    chunk1: List[str] = []
+    chunk2: List[str] = []
+    size = 0
+
+    def flush():
+        nonlocal chunk1, chunk2, size
+        if chunk1 or chunk2:
+            pairs.append(("".join(chunk1), "".join(chunk2)))
+        chunk1, chunk2, size = [], [], 0
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            # Unchanged lines are identical in both documents, so a boundary can
+            # fall between any two of them without misaligning the chunks
+            for line in lines1[i1:i2]:
+                if size + len(line) > max_chars:
+                    flush()
+                chunk1.append(line)
+                chunk2.append(line)
+                size += len(line)
+        else:
+            # Keep a changed region whole so the change is seen in one piece
+            old_lines = lines1[i1:i2]
+            new_lines = lines2[j1:j2]
+            change_size = max(sum(map(len, old_lines)), sum(map(len, new_lines)))
+            if size + change_size > max_chars:
+                flush()
+            chunk1.extend(old_lines)
+            chunk2.extend(new_lines)
+            size += change_size
+
+    flush()
+    return pairs
@@ -0,0 +1,35 @@
+"""
+Document Diff Module
+
+This module computes a compact line-level diff of two versions of a document, which
+is sent to the LLM in place of the full documents.
+"""
+
+import difflib
+
+
+# Default number of unchanged lines shown around each change
+DEFAULT_CONTEXT_LINES = 3
+
+
+def compute_diff(doc1: str, doc2: str, context_lines: int = DEFAULT_CONTEXT_LINES) -> str:
+    """
+    Compute a unified diff between two versions of a document.
+
+    Args:
+        doc1: Content of the first document
+        doc2: Content of the second document
+        context_lines: Number of unchanged lines shown around each change
+
+    Returns:
+        The unified diff, or an empty string if the documents have the same lines
+    """
+    diff_lines = difflib.unified_diff(
+        doc1.splitlines(),
+        doc2.splitlines(),
+        fromfile="Document 1",
+        tofile="Document 2",
+        n=context_lines,
+        lineterm="",
+    )
+    return "\n".join(diff_lines)
@@ -5,9 +5,32 @@ This module handles loading documents from various file formats.
 """
 
 import os
+import mmap
+import hashlib
+import tempfile
+import threading
+import zipfile
 from typing import Dict, Any, Optional
-from pypdf import PdfReader
-from docx import Document
+import pypdfium2 as pdfium
+from lxml import etree
+
+
+# Default location of the extracted-text cache
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "contract-comparison")
+
+# Bump when the text extraction changes so stale cached text is not reused
+_CACHE_VERSION = "3"
+
+# PDFium is not thread-safe, so PDF extraction is serialized across threads
+_PDFIUM_LOCK = threading.Lock()
+
+# WordprocessingML elements used to extract the text of a DOCX file
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P = _W_NS + "p"
+_W_T = _W_NS + "t"
+_W_TAB = _W_NS + "tab"
+_W_BR = _W_NS + "br"
+_W_CR = _W_NS + "cr"
 
 
 class DocumentLoader:
@@ -15,48 +38,154 @@ class DocumentLoader:
     A class for loading documents from various file formats.
     """
     
-    def load_document(self, file_path: str) -> str:
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialize the document loader.
+        
+        Args:
+            cache_dir: Directory where extracted text is cached, keyed by the file contents,
+                e.g. DEFAULT_CACHE_DIR. Defaults to None, which disables caching so the
+                text of a document is never written to disk.
+        """
+        self.cache_dir = cache_dir
+    
+    def load_document(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """
         Load a document from a file path.
         
         Args:
             file_path: Path to the document file
+            max_chars: Only return the first max_chars characters of the text. The
+                document is only read as far as needed to produce them.
             
         Returns:
             The text content of the document
         
         Raises:
-            ValueError: If the file format is not supported
+            ValueError: If the file format is not supported or max_chars is negative
         """
+        if max_chars is not None and max_chars < 0:
+            raise ValueError(f"max_chars must not be negative: {max_chars}")
+
         _, file_extension = os.path.splitext(file_path)
         file_extension = file_extension.lower()
         
+        if file_extension not in ('.pdf', '.docx', '.txt'):
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        # A prefix is extracted directly; hashing the whole file for the cache would
+        # read more than the prefix itself, and the cache only holds complete texts
+        if self.cache_dir is None or max_chars is not None:
+            return self._extract_text(file_path, file_extension, max_chars)
+        
+        # Reuse the text extracted from a file with identical contents
+        cache_path = os.path.join(self.cache_dir, self._cache_key(file_path, file_extension) + ".txt")
+        try:
+            with open(cache_path, 'r', encoding='utf-8', newline='') as file:
+                return file.read()
+        except FileNotFoundError:
+            pass
+        
+        text = self._extract_text(file_path, file_extension)
+        self._write_cache(cache_path, text)
+        return text
+    
+    def _extract_text(self, file_path: str, file_extension: str, max_chars: Optional[int] = None) -> str:
+        """Extract the text of a document with the loader for its format."""
         if file_extension == '.pdf':
-            return self._load_pdf(file_path)
+            return self._load_pdf(file_path, max_chars)
         elif file_extension == '.docx':
-            return self._load_docx(file_path)
-        elif file_extension == '.txt':
-            return self._load_txt(file_path)
+            return self._load_docx(file_path, max_chars)
         else:
-            raise ValueError(f"Unsupported file format: {file_extension}")
+            return self._load_txt(file_path, max_chars)
+    
+    def _cache_key(self, file_path: str, file_extension: str) -> str:
+        """Compute the cache key of a document from its contents."""
+        digest = hashlib.blake2b(f"{_CACHE_VERSION}{file_extension}".encode('utf-8'), digest_size=32)
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
     
-    def _load_pdf(self, file_path: str) -> str:
+    def _write_cache(self, cache_path: str, text: str) -> None:
+        """Store extracted text in the cache, ignoring an unwritable cache directory."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                file.write(text)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    
+    def _load_pdf(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """Load text from a PDF file."""
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        # PDFium decodes one page at a time, so only the current page is held in memory
+        parts = []
+        size = 0
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                for index in range(len(pdf)):
+                    # Stop decoding pages once the requested prefix is complete
+                    if max_chars is not None and size >= max_chars:
+                        break
+                    page = pdf[index]
+                    text_page = page.get_textpage()
+                    parts.append(text_page.get_text_range().replace("\r\n", "\n"))
+                    size += len(parts[-1]) + 1
+                    text_page.close()
+                    page.close()
+            finally:
+                pdf.close()
+        text = "\n".join(parts) + "\n" if parts else ""
+        return text[:max_chars]
     
-    def _load_docx(self, file_path: str) -> str:
+    def _load_docx(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """Load text from a DOCX file."""
-        doc = Document(file_path)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text
+        # Stream the body XML with lxml instead of building python-docx's object model
+        parts = []
+        size = 0
+        with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as xml_file:
+            for _, paragraph in etree.iterparse(xml_file, tag=_W_P):
+                parts.append(self._docx_paragraph_text(paragraph))
+                size += len(parts[-1]) + 1
+                # Free the parsed paragraph; nested paragraphs are not counted twice
+                paragraph.clear()
+                # Stop parsing once the requested prefix is complete
+                if max_chars is not None and size >= max_chars:
+                    break
+        text = "\n".join(parts) + "\n" if parts else ""
+        return text[:max_chars]
     
-    def _load_txt(self, file_path: str) -> str:
+    def _docx_paragraph_text(self, paragraph: etree._Element) -> str:
+        """Get the text of a DOCX paragraph element, keeping tabs and line breaks."""
+        text = []
+        for element in paragraph.iter(_W_T, _W_TAB, _W_BR, _W_CR):
+            if element.tag == _W_T:
+                text.append(element.text or "")
+            elif element.tag == _W_TAB:
+                text.append("\t")
+            elif element.get(_W_NS + "type") != "page":
+                text.append("\n")
+        return "".join(text)
+    
+    def _load_txt(self, file_path: str, max_chars: Optional[int] = None) -> str:
         """Load text from a plain text file."""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        # Only decode the requested prefix; universal newlines normalize line endings
+        if max_chars is not None:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                return file.read(max_chars)
+        
+        with open(file_path, 'rb') as file:
+            # An empty file cannot be memory-mapped
+            if os.fstat(file.fileno()).st_size == 0:
+                return ""
+            # Decode straight from the mapped pages instead of reading into an intermediate copy
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                text = str(mapped, 'utf-8')
+        # Normalize line endings the way text-mode reads did
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
@@ -0,0 +1,182 @@
+"""
+Groq Batch API Support
+
+This module provides a ChatGroq variant that submits its requests through the
+Groq Batch API, trading latency (results within the completion window) for a
+lower price on non-interactive runs.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import orjson
+from groq import Groq
+from pydantic import PrivateAttr
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_groq import ChatGroq
+
+
+# Batch statuses after which the job will not make further progress
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchChatGroq(ChatGroq):
+    """
+    A ChatGroq model that sends its requests through the Groq Batch API.
+
+    Requests made concurrently on the same event loop within batch_delay of each
+    other are submitted together as one batch job, so independent calls (such as
+    the structural and semantic analyses of every diff chunk) should be issued
+    concurrently to share a job and its completion window.
+    """
+
+    completion_window: str = "24h"
+    """Time frame within which the batch job should be processed."""
+
+    poll_interval: float = 30.0
+    """Seconds to wait between two batch status checks."""
+
+    batch_delay: float = 1.0
+    """Seconds to collect concurrent requests before they are submitted as one batch job."""
+
+    # Batch jobs return whole responses, so never take the streaming path
+    disable_streaming: bool = True
+
+    # Requests waiting for the next batch job of each event loop, and the tasks
+    # that submit them; futures can only be resolved on the loop that created them
+    _pending: Dict[asyncio.AbstractEventLoop, List[Tuple[Dict[str, Any], asyncio.Future]]] = PrivateAttr(
+        default_factory=dict
+    )
+    _flush_tasks: Set[asyncio.Task] = PrivateAttr(default_factory=set)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a chat result by submitting the request as a batch job of its own."""
+        response = self._submit_batch([self._request_body(messages, stop, **kwargs)])[0]
+        if isinstance(response, Exception):
+            raise response
+        return self._create_chat_result(response)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """Generate a chat result in the batch job shared with concurrent requests."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((self._request_body(messages, stop, **kwargs), future))
+
+        # The first request of a job schedules its submission
+        if len(pending) == 1:
+            task = loop.create_task(self._flush_pending(loop))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+        return self._create_chat_result(await future)
+
+    async def _flush_pending(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Submit the requests collected on an event loop as one batch job.
+
+        Args:
+            loop: The event loop whose pending requests are submitted
+        """
+        await asyncio.sleep(self.batch_delay)
+        pending = self._pending.pop(loop, [])
+
+        try:
+            # The job is polled for up to its completion window, so keep it off the event loop
+            responses = await asyncio.to_thread(self._submit_batch, [body for body, _ in pending])
+        except Exception as e:
+            responses = [e] * len(pending)
+
+        for (_, future), response in zip(pending, responses):
+            if future.done():
+                continue
+            if isinstance(response, Exception):
+                future.set_exception(response)
+            else:
+                future.set_result(response)
+
+    def _request_body(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> Dict[str, Any]:
+        """
+        Build the chat completion request body of a call.
+
+        Args:
+            messages: The messages of the call
+            stop: Optional stop sequences
+            kwargs: Additional request parameters
+
+        Returns:
+            The chat completion request body
+        """
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        body = {**params, **kwargs, "messages": message_dicts}
+        body.pop("stream", None)
+        return body
+
+    def _submit_batch(self, bodies: List[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Submit chat completion requests as one batch job and wait for their results.
+
+        Args:
+            bodies: The chat completion request bodies
+
+        Returns:
+            The chat completion response body of each request, in order, or the
+            error of a request that failed within an otherwise completed job
+
+        Raises:
+            RuntimeError: If the batch job itself failed
+        """
+        api_key = self.groq_api_key.get_secret_value() if self.groq_api_key else None
+        client = Groq(api_key=api_key, base_url=self.groq_api_base)
+
+        lines = [
+            orjson.dumps({"custom_id": f"request-{index}", "method": "POST", "url": "/v1/chat/completions", "body": body})
+            for index, body in enumerate(bodies)
+        ]
+        input_file = client.files.create(file=("batch.jsonl", b"\n".join(lines)), purpose="batch")
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+
+        while batch.status not in _TERMINAL_STATUSES:
+            time.sleep(self.poll_interval)
+            batch = client.batches.retrieve(batch.id)
+
+        if batch.status != "completed":
+            raise RuntimeError(f"Groq batch {batch.id} finished with status '{batch.status}'")
+
+        # Successful requests are in the output file and failed ones in the error file
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                for line in client.files.content(file_id).read().splitlines():
+                    if line.strip():
+                        result = orjson.loads(line)
+                        results[result["custom_id"]] = result
+
+        responses: List[Union[Dict[str, Any], Exception]] = []
+        for index in range(len(bodies)):
+            result = results.get(f"request-{index}") or {}
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                responses.append(RuntimeError(
+                    f"Groq batch {batch.id} request {index} failed: {result.get('error') or response or 'no result'}"
+                ))
+            else:
+                responses.append(response["body"])
+        return responses
@@ -0,0 +1,111 @@
+"""
+Workflow Result Cache
+
+This module provides the in-memory cache used to reuse the results of earlier
+comparisons when the same pair of documents is submitted again.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+# Default number of entries kept by a cache
+DEFAULT_CACHE_SIZE = 1000
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class LRUCache:
+    """
+    A bounded, thread-safe mapping that evicts the least recently used entry.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept in the cache
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value and mark it as recently used.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if the key is not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The cache key
+            value: The value to cache
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+
+def document_pair_key(doc1_content: str, doc2_content: str) -> str:
+    """
+    Compute the cache key of a pair of documents.
+
+    Runs of whitespace are collapsed before hashing, so re-submissions that only
+    differ in line wrapping or spacing (e.g. the same contract exported again)
+    map to the same key.
+
+    Args:
+        doc1_content: Content of the first document
+        doc2_content: Content of the second document
+
+    Returns:
+        A hex digest identifying the document pair
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for content in (doc1_content, doc2_content):
+        normalized = _WHITESPACE.sub(" ", content).strip()
+        digest.update(normalized.encode("utf-8"))
+        # Separate the documents so moving text from one to the other changes the key
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def content_key(*parts: str) -> str:
+    """
+    Compute an exact cache key of a sequence of strings.
+
+    Args:
+        parts: The strings identifying the cached value, e.g. a step name and its inputs
+
+    Returns:
+        A hex digest identifying the strings, in order
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
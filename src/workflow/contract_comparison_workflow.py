@@ -6,24 +6,333 @@ The workflow includes document loading, structure analysis, semantic analysis,
 final analysis, risk analysis, and summary generation.
 """
 
-import json
-from typing import Dict, List, Any, TypedDict, Annotated
+import os
+import time
+import asyncio
+import operator
+import threading
+from functools import lru_cache
+import httpx
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Any, Optional, Tuple, Type, TypedDict, Annotated
+import orjson
+from pydantic import BaseModel
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from langchain_core.output_parsers import StrOutputParser
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
+from src.comparison.chunking import DEFAULT_MAX_CHUNK_CHARS, split_aligned
+from src.comparison.diff import DEFAULT_CONTEXT_LINES, compute_diff
+from src.workflow.batch import BatchChatGroq
+from src.workflow.cache import LRUCache, content_key, document_pair_key
+from src.workflow.schemas import StructuralComparison, SemanticComparison, FinalComparison, RiskAnalysis
 
 
-# Define the state schema
+MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
+
+# Maximum number of diff chunks an analysis sends to the LLM at the same time
+DEFAULT_MAX_CONCURRENCY = 4
+
+# HTTP settings of the shared client; the pool is sized for every concurrent call of a run
+REQUEST_TIMEOUT = 60.0
+MAX_RETRIES = 2
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=32)
+
+# Shared clients are cached per API key; the bound keeps keys entered in the web UI
+# from each pinning a client and its connection pool for the life of the process
+LLM_CACHE_SIZE = 8
+
+# Report returned when the documents have no textual differences (line endings aside),
+# in place of a generated summary
+UNCHANGED_SUMMARY = """# Contract Comparison Report
+
+## Executive Summary
+
+No textual differences were found between the two documents. No structural or semantic
+changes were found, so the revised document introduces no new risks.
+"""
+
+# Assessment and report used when the documents differ, but the analyses found no
+# structural or semantic change, e.g. after reformatting; no LLM call is needed then
+NO_CHANGES_ASSESSMENT = "The documents differ only in formatting or wording; no structural or semantic changes were found."
+NO_CHANGES_SUMMARY = """# Contract Comparison Report
+
+## Executive Summary
+
+The two documents differ only in formatting or wording. No structural or semantic changes
+were found, so the revised document introduces no new risks.
+"""
+
+# Prompts for each step of the workflow. The static instructions are sent as the system
+# message and the run-specific data as the human message after it, so every call of a
+# step starts with the same bytes and can be served from the provider's prompt cache
+STRUCTURAL_ANALYSIS_SYSTEM_PROMPT = """You are a legal document structure analyzer.
+You will receive a unified diff of two versions of a legal document: lines starting with "-" are only in Document 1,
+lines starting with "+" are only in Document 2, and the other lines are unchanged context.
+I need to understand the structural changes between them.
+
+Please analyze the structural differences between these documents. Focus on:
+1. Added sections in Document 2 that weren't in Document 1
+2. Removed sections that were in Document 1 but aren't in Document 2
+3. Reorganized sections (sections that moved to different places)"""
+
+SEMANTIC_ANALYSIS_SYSTEM_PROMPT = """You are a legal document semantic analyzer.
+You will receive a unified diff of two versions of a legal document: lines starting with "-" are only in Document 1,
+lines starting with "+" are only in Document 2, and the other lines are unchanged context.
+I need to understand the semantic changes between them.
+
+Please analyze the semantic differences between these documents. Focus on:
+1. Changes in defined terms
+2. Changes in obligations for each party
+3. Changes in conditions or requirements"""
+
+DIFF_HUMAN_TEMPLATE = """# Changes from Document 1 to Document 2 (unified diff):
+{diff}"""
+
+FINAL_ANALYSIS_SYSTEM_PROMPT = """You are a legal document analysis expert.
+You will receive structural and semantic analyses of two versions of a legal document.
+
+Please provide a final comprehensive analysis of the changes between these documents. Focus on:
+1. The most significant changes and their potential impact
+2. An overall assessment of how substantially the document has changed
+3. Any potential inconsistencies or issues created by the changes"""
+
+RISK_ANALYSIS_SYSTEM_PROMPT = """You are a legal risk assessment expert.
+You will receive a comparison analysis of two versions of a legal document.
+
+Please analyze the risks associated with the changes between these documents. Focus on:
+1. Legal risks (e.g., compliance issues, regulatory concerns)
+2. Business risks (e.g., increased liability, unfavorable terms)
+3. Operational risks (e.g., new obligations, resource requirements)
+4. Strategic risks (e.g., long-term implications, competitive disadvantages)
+
+For each identified risk:
+- Provide a clear description of the risk
+- Explain why it's a risk
+- Rate its severity (Low, Medium, High)
+- Suggest potential mitigations"""
+
+COMPARISON_HUMAN_TEMPLATE = """# Structural Comparison:
+{structural_comparison}
+
+# Semantic Comparison:
+{semantic_comparison}"""
+
+SUMMARY_SYSTEM_PROMPT = """You are a legal document summarization expert.
+You will receive the comparison and risk analyses of two versions of a legal document.
+
+Please generate a comprehensive, well-structured markdown report that summarizes the changes and risks.
+
+The report should include:
+
+1. Executive Summary
+   - Brief overview of the documents compared
+   - Summary of the most significant changes
+   - Summary of the most critical risks
+
+2. Detailed Changes Analysis
+   - Structural changes (added/removed/reorganized sections)
+   - Semantic changes (terms, obligations, conditions)
+   - Impact assessment of these changes
+
+3. Risk Assessment
+   - Legal risks
+   - Business risks
+   - Operational risks
+   - Strategic risks
+
+4. Recommendations
+   - Suggested actions to address identified risks
+   - Areas that may require further legal review
+
+Format the report in clear, professional markdown with appropriate headings, bullet points, and emphasis where needed."""
+
+SUMMARY_HUMAN_TEMPLATE = """# Final Comparison:
+{final_comparison}
+
+# Risk Analysis:
+{risk_analysis}"""
+
+
+def _chat_prompt(system_prompt: str, human_template: str) -> ChatPromptTemplate:
+    """
+    Build a chat prompt from static instructions and a template for the run-specific data.
+
+    Args:
+        system_prompt: Instructions sent unchanged as the system message
+        human_template: Template of the human message holding the data to analyze
+
+    Returns:
+        The chat prompt template
+    """
+    return ChatPromptTemplate.from_messages([("system", system_prompt), ("human", human_template)])
+
+
+# Prompt templates are parsed once at import and shared by every workflow instance
+STRUCTURAL_ANALYSIS_PROMPT = _chat_prompt(STRUCTURAL_ANALYSIS_SYSTEM_PROMPT, DIFF_HUMAN_TEMPLATE)
+SEMANTIC_ANALYSIS_PROMPT = _chat_prompt(SEMANTIC_ANALYSIS_SYSTEM_PROMPT, DIFF_HUMAN_TEMPLATE)
+FINAL_ANALYSIS_PROMPT = _chat_prompt(FINAL_ANALYSIS_SYSTEM_PROMPT, COMPARISON_HUMAN_TEMPLATE)
+RISK_ANALYSIS_PROMPT = _chat_prompt(RISK_ANALYSIS_SYSTEM_PROMPT, COMPARISON_HUMAN_TEMPLATE)
+SUMMARY_PROMPT = _chat_prompt(SUMMARY_SYSTEM_PROMPT, SUMMARY_HUMAN_TEMPLATE)
+
+
+def get_workflow_fingerprint() -> str:
+    """
+    Get an identifier of everything that shapes what the workflow sends to the model.
+
+    It changes whenever a prompt, an output schema, the diff chunking or the model is
+    changed, so stored results can be checked against the workflow that would produce
+    them now.
+
+    Returns:
+        A hex digest of the model name, the diff settings, every prompt and every schema
+    """
+    # The schemas are sent to the model as tool definitions, so their field
+    # descriptions are part of the prompt
+    schemas = (StructuralComparison, SemanticComparison, FinalComparison, RiskAnalysis)
+    return content_key(
+        MODEL_NAME,
+        str(DEFAULT_MAX_CHUNK_CHARS),
+        str(DEFAULT_CONTEXT_LINES),
+        STRUCTURAL_ANALYSIS_SYSTEM_PROMPT,
+        SEMANTIC_ANALYSIS_SYSTEM_PROMPT,
+        DIFF_HUMAN_TEMPLATE,
+        FINAL_ANALYSIS_SYSTEM_PROMPT,
+        RISK_ANALYSIS_SYSTEM_PROMPT,
+        COMPARISON_HUMAN_TEMPLATE,
+        SUMMARY_SYSTEM_PROMPT,
+        SUMMARY_HUMAN_TEMPLATE,
+        *(orjson.dumps(schema.model_json_schema()).decode() for schema in schemas)
+    )
+
+
+class _LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    An async HTTP client that keeps one connection pool per event loop.
+
+    The connections of an httpx pool belong to the event loop that opened them, so a
+    client shared by runs on different loops (e.g. successive asyncio.run calls)
+    would reuse connections of a closed loop. Requests are sent through a pool of
+    the running loop instead, and pools of closed loops are dropped.
+    """
+
+    def __init__(self, **kwargs: Any):
+        """
+        Initialize the client.
+
+        Args:
+            kwargs: Settings of the httpx.AsyncClient created for each event loop
+        """
+        super().__init__(**kwargs)
+        self._client_kwargs = kwargs
+        self._loop_clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._loop_clients_lock = threading.Lock()
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        """Send a request through the connection pool of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._loop_clients_lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                # Connections of a closed loop can't be used or closed any more
+                for closed_loop in [other for other in self._loop_clients if other.is_closed()]:
+                    del self._loop_clients[closed_loop]
+                client = self._loop_clients[loop] = httpx.AsyncClient(**self._client_kwargs)
+        return await client.send(request, **kwargs)
+
+
+@lru_cache(maxsize=LLM_CACHE_SIZE)
+def get_llm(api_key: Optional[str] = None) -> ChatGroq:
+    """
+    Get the ChatGroq client shared by every workflow that uses the same API key.
+
+    Reusing one client lets all LLM calls on an event loop share its HTTP connection
+    pool. The pool keeps its connections alive over HTTP/2, so the calls of a run
+    multiplex over already-open TLS sessions instead of opening new ones. Only the
+    LLM_CACHE_SIZE most recently used keys keep their client.
+
+    Args:
+        api_key: The Groq API key; each key gets its own client
+
+    Returns:
+        The shared ChatGroq client
+    """
+    return ChatGroq(
+        model=MODEL_NAME,
+        temperature=0,
+        api_key=api_key,
+        request_timeout=REQUEST_TIMEOUT,
+        max_retries=MAX_RETRIES,
+        http_async_client=_LoopLocalAsyncClient(http2=True, limits=HTTP_LIMITS, timeout=REQUEST_TIMEOUT)
+    )
+
+
+@lru_cache(maxsize=LLM_CACHE_SIZE)
+def get_batch_llm(api_key: Optional[str] = None) -> BatchChatGroq:
+    """
+    Get the shared client that sends every request through the Groq Batch API.
+
+    Args:
+        api_key: The Groq API key; each key gets its own client
+
+    Returns:
+        The shared BatchChatGroq client
+    """
+    return BatchChatGroq(model=MODEL_NAME, temperature=0, api_key=api_key)
+
+
+# Results of earlier runs and of individual LLM steps, shared by every workflow in the process
+_result_cache = LRUCache()
+_step_cache = LRUCache()
+
+# State keys left out of cached results; the documents are supplied again by each
+# run, and keeping them would hold every compared contract in memory
+_UNCACHED_STATE_KEYS = ("doc1_content", "doc2_content", "diff_chunks", "node_timings")
+
+
+_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the long-lived event loop used to run workflows from synchronous code.
+
+    The shared client's async connections are bound to the loop they were opened on,
+    so every synchronous run is executed on the same background loop instead of a
+    fresh asyncio.run() loop that would be closed after each call.
+
+    Returns:
+        The background event loop
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="contract-comparison-loop", daemon=True).start()
+    return _event_loop
+
+
+# Define the state schema; nodes that run in parallel write disjoint keys, so
+# only keys written by several of them declare how their updates are merged
 class ContractComparisonState(TypedDict):
     """State for the contract comparison workflow."""
     doc1_content: str
     doc2_content: str
+    diff_chunks: List[str]
     structural_comparison: Dict[str, Any]
     semantic_comparison: Dict[str, Any]
     final_comparison: Dict[str, Any]
     risk_analysis: Dict[str, Any]
+    # JSON form of each result, serialized once by the node that produced it
+    structural_comparison_str: str
+    semantic_comparison_str: str
+    final_comparison_str: str
+    risk_analysis_str: str
     summary: str
+    # Duration of each node in milliseconds; nodes running in the same step each
+    # report their own, so the updates are merged
+    node_timings: Annotated[Dict[str, float], operator.or_]
 
 
 class ContractComparisonWorkflow:
@@ -31,12 +340,61 @@ class ContractComparisonWorkflow:
     A unified workflow for contract comparison using LangGraph.
     """
 
-    def __init__(self):
-        """Initialize the contract comparison workflow."""
-        # The API key is set in the environment by the check_api_key function
-        self.llm = ChatGroq(model="meta-llama/llama-4-scout-17b-16e-instruct", temperature=0)
+    def __init__(
+        self,
+        batch: bool = False,
+        max_chunk_chars: int = DEFAULT_MAX_CHUNK_CHARS,
+        cache_enabled: bool = True,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        llm: Optional[ChatGroq] = None,
+        exact_cache_enabled: bool = True,
+        api_key: Optional[str] = None
+    ):
+        """
+        Initialize the contract comparison workflow.
+
+        Args:
+            batch: Send every LLM request through the Groq Batch API. Runs are billed
+                at the discounted batch rate but may take up to the batch completion window.
+            max_chunk_chars: Documents longer than this are diffed in aligned chunks whose
+                structural and semantic results are merged before the final analysis.
+            cache_enabled: Reuse the results of an earlier run when the same pair of
+                documents, ignoring differences in whitespace, is compared again.
+            max_concurrency: Maximum number of diff chunks each of the structural and
+                semantic analyses sends to the LLM at the same time. Not applied in batch
+                mode, where every chunk goes into the same batch job.
+            llm: Chat model to use instead of the shared client, e.g. one with its own
+                HTTP client. ChatGroq clients are safe to share between threads and
+                workflows, so a long-lived one can be passed to every workflow.
+            exact_cache_enabled: Reuse the output of an LLM step whose exact inputs were
+                already processed, e.g. an unchanged diff chunk of a revised document.
+            api_key: The Groq API key used for the shared client. Defaults to the
+                GROQ_API_KEY environment variable at the time the workflow is created.
+        """
+        if llm is not None:
+            self.llm = llm
+        else:
+            # The shared clients are cached per key, so a changed key gets a new client
+            api_key = api_key or os.environ.get("GROQ_API_KEY")
+            self.llm = get_batch_llm(api_key) if batch else get_llm(api_key)
+        # The caches are shared by every workflow in the process, so their keys include
+        # the model; a workflow given another model never reuses this one's results
+        self._model_id = f"{getattr(self.llm, 'model_name', type(self.llm).__name__)}:{getattr(self.llm, 'temperature', '')}"
+        self.max_chunk_chars = max_chunk_chars
+        self.cache_enabled = cache_enabled
+        self.max_concurrency = max_concurrency
+        self.exact_cache_enabled = exact_cache_enabled
+        self._build_chains()
         self.graph = self._build_graph()
 
+    def _build_chains(self) -> None:
+        """Build the chain of each workflow step once, so runs only invoke them."""
+        self._structural_chain = STRUCTURAL_ANALYSIS_PROMPT | self.llm.with_structured_output(StructuralComparison)
+        self._semantic_chain = SEMANTIC_ANALYSIS_PROMPT | self.llm.with_structured_output(SemanticComparison)
+        self._final_chain = FINAL_ANALYSIS_PROMPT | self.llm.with_structured_output(FinalComparison)
+        self._risk_chain = RISK_ANALYSIS_PROMPT | self.llm.with_structured_output(RiskAnalysis)
+        self._summary_chain = SUMMARY_PROMPT | self.llm | StrOutputParser()
+
     def _build_graph(self) -> StateGraph:
         """
         Build the workflow graph.
@@ -48,26 +406,48 @@ class ContractComparisonWorkflow:
         graph = StateGraph(ContractComparisonState)
 
         # Add nodes
-        graph.add_node("structural_analysis", self._structural_analysis)
-        graph.add_node("semantic_analysis", self._semantic_analysis)
-        graph.add_node("final_analysis", self._final_analysis)
-        graph.add_node("risk_analyzer", self._risk_analysis)
-        graph.add_node("summary_generation", self._summary_generation)
-
-        # Define the edges
-        graph.add_edge("structural_analysis", "semantic_analysis")
-        graph.add_edge("semantic_analysis", "final_analysis")
-        graph.add_edge("final_analysis", "risk_analyzer")
-        graph.add_edge("risk_analyzer", "summary_generation")
+        graph.add_node("structural_analysis", self._timed("structural_analysis", self._structural_analysis))
+        graph.add_node("semantic_analysis", self._timed("semantic_analysis", self._semantic_analysis))
+        graph.add_node("final_analysis", self._timed("final_analysis", self._final_analysis))
+        graph.add_node("risk_analyzer", self._timed("risk_analyzer", self._risk_analysis))
+        graph.add_node("summary_generation", self._timed("summary_generation", self._summary_generation))
+
+        # Define the edges; structural and semantic analyses are independent,
+        # so they fan out from the start. The final and risk analyses both only
+        # need those two results, so they also run side by side before the summary
+        graph.add_edge(START, "structural_analysis")
+        graph.add_edge(START, "semantic_analysis")
+        graph.add_edge(["structural_analysis", "semantic_analysis"], "final_analysis")
+        graph.add_edge(["structural_analysis", "semantic_analysis"], "risk_analyzer")
+        graph.add_edge(["final_analysis", "risk_analyzer"], "summary_generation")
         graph.add_edge("summary_generation", END)
 
-        # Set the entry point
-        graph.set_entry_point("structural_analysis")
-
         # Compile the graph
         return graph.compile()
 
-    def _structural_analysis(self, state: ContractComparisonState) -> ContractComparisonState:
+    def _timed(
+        self,
+        name: str,
+        node: Callable[[ContractComparisonState], Awaitable[Dict[str, Any]]]
+    ) -> Callable[[ContractComparisonState], Awaitable[Dict[str, Any]]]:
+        """
+        Wrap a node so its update also records how long the node took.
+
+        Args:
+            name: The name of the node in the graph
+            node: The node function
+
+        Returns:
+            A node function that adds its duration to the node_timings of the state
+        """
+        async def timed_node(state: ContractComparisonState) -> Dict[str, Any]:
+            start = time.perf_counter_ns()
+            update = await node(state)
+            return {**update, "node_timings": {name: (time.perf_counter_ns() - start) / 1e6}}
+
+        return timed_node
+
+    async def _structural_analysis(self, state: ContractComparisonState) -> Dict[str, Any]:
         """
         Perform structural analysis on the documents.
 
@@ -77,58 +457,78 @@ class ContractComparisonWorkflow:
         Returns:
             The updated state
         """
-        doc1 = state["doc1_content"]
-        doc2 = state["doc2_content"]
-
-        # Create the structural comparison prompt
-        structural_comparison_prompt = ChatPromptTemplate.from_template(
-            """You are a legal document structure analyzer.
-            I have two versions of a legal document and need to understand the structural changes between them.
-
-            # Document 1:
-            {doc1}
+        structural_analysis = await self._compare_in_chunks(self._structural_chain, StructuralComparison, state)
 
-            # Document 2:
-            {doc2}
+        # Only return the updated keys; this node runs in parallel with the semantic analysis
+        return {
+            "structural_comparison": structural_analysis,
+            "structural_comparison_str": orjson.dumps(structural_analysis).decode()
+        }
 
-            Please analyze the structural differences between these documents. Focus on:
-            1. Added sections in Document 2 that weren't in Document 1
-            2. Removed sections that were in Document 1 but aren't in Document 2
-            3. Reorganized sections (sections that moved to different places)
+    async def _semantic_analysis(self, state: ContractComparisonState) -> Dict[str, Any]:
+        """
+        Perform semantic analysis on the documents.
 
-            Format your response as a JSON object with the following structure:
-            ```json
-            {{
-                "added_sections": [{{"section": "section_name", "content": "content"}}],
-                "removed_sections": [{{"section": "section_name", "content": "content"}}],
-                "reorganized_sections": [{{"old_section": "old_name", "new_section": "new_name"}}]
-            }}
-            ```
+        Args:
+            state: The current state
 
-            Only include the JSON in your response, no other text."""
-        )
+        Returns:
+            The updated state
+        """
+        semantic_analysis = await self._compare_in_chunks(self._semantic_chain, SemanticComparison, state)
 
-        structural_comparison_chain = structural_comparison_prompt | self.llm | StrOutputParser()
-        structural_result = structural_comparison_chain.invoke({"doc1": doc1, "doc2": doc2})
+        # Only return the updated keys; this node runs in parallel with the structural analysis
+        return {
+            "semantic_comparison": semantic_analysis,
+            "semantic_comparison_str": orjson.dumps(semantic_analysis).decode()
+        }
 
-        # Parse the result
-        try:
-            # Check if the result contains a JSON code block
-            if "```json" in structural_result:
-                # Extract the JSON part
-                json_part = structural_result.split("```json")[1].split("```")[0].strip()
-                structural_analysis = json.loads(json_part)
-            else:
-                structural_analysis = json.loads(structural_result)
-        except json.JSONDecodeError:
-            structural_analysis = {"error": "Failed to parse structural analysis result", "raw_result": structural_result}
+    async def _compare_in_chunks(
+        self, chain: Runnable, schema: Type[BaseModel], state: ContractComparisonState
+    ) -> Dict[str, Any]:
+        """
+        Run a comparison chain over each chunk of the document diff.
 
-        # Update the state
-        return {**state, "structural_comparison": structural_analysis}
+        Args:
+            chain: The structural or semantic comparison chain
+            schema: The structured output schema of the chain
+            state: The current state
 
-    def _semantic_analysis(self, state: ContractComparisonState) -> ContractComparisonState:
+        Returns:
+            The comparison result, with the lists from every chunk concatenated
         """
-        Perform semantic analysis on the documents.
+        diff_chunks = state["diff_chunks"]
+        keys = [content_key(self._model_id, schema.__name__, diff) for diff in diff_chunks]
+        results: List[Optional[BaseModel]] = [
+            _step_cache.get(key) if self.exact_cache_enabled else None for key in keys
+        ]
+
+        # Submit the uncached chunks as one batch, bounded so long documents stay within rate
+        # limits. Batch API requests are not rate limited the same way, and only requests in
+        # flight together share a batch job, so they are all sent at once
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            max_concurrency = None if isinstance(self.llm, BatchChatGroq) else self.max_concurrency
+            computed = await chain.abatch(
+                [{"diff": diff_chunks[index]} for index in missing],
+                config={"max_concurrency": max_concurrency}
+            )
+            for index, result in zip(missing, computed):
+                result = self._structured_result(result, schema.__name__)
+                results[index] = result
+                if self.exact_cache_enabled:
+                    _step_cache.put(keys[index], result)
+
+        # Every field of the comparison schemas is a list of changes
+        merged = {field: [] for field in schema.model_fields}
+        for result in results:
+            for key, items in result.model_dump().items():
+                merged[key].extend(items)
+        return merged
+
+    async def _final_analysis(self, state: ContractComparisonState) -> Dict[str, Any]:
+        """
+        Perform final analysis on the documents.
 
         Args:
             state: The current state
@@ -136,310 +536,355 @@ class ContractComparisonWorkflow:
         Returns:
             The updated state
         """
-        doc1 = state["doc1_content"]
-        doc2 = state["doc2_content"]
+        if self._has_changes(state):
+            final_result = await self._invoke_cached(self._final_chain, "final_analysis", {
+                "structural_comparison": state["structural_comparison_str"],
+                "semantic_comparison": state["semantic_comparison_str"]
+            })
+            final_analysis = self._structured_result(final_result, "final_analysis").model_dump()
+        else:
+            final_analysis = {
+                "significant_changes": [],
+                "overall_assessment": NO_CHANGES_ASSESSMENT,
+                "potential_inconsistencies": []
+            }
+
+        # Only return the updated keys; this node runs in parallel with the risk analysis
+        return {
+            "final_comparison": final_analysis,
+            "final_comparison_str": orjson.dumps(final_analysis).decode()
+        }
 
-        # Create the semantic comparison prompt
-        semantic_comparison_prompt = ChatPromptTemplate.from_template(
-            """You are a legal document semantic analyzer.
-            I have two versions of a legal document and need to understand the semantic changes between them.
+    async def _risk_analysis(self, state: ContractComparisonState) -> Dict[str, Any]:
+        """
+        Perform risk analysis on the documents.
 
-            # Document 1:
-            {doc1}
+        Args:
+            state: The current state
 
-            # Document 2:
-            {doc2}
+        Returns:
+            The updated state
+        """
+        # The comparisons already capture every change, so the full documents are not re-sent
+        if self._has_changes(state):
+            risk_analysis_result = await self._invoke_cached(self._risk_chain, "risk_analysis", {
+                "structural_comparison": state["structural_comparison_str"],
+                "semantic_comparison": state["semantic_comparison_str"]
+            })
+            risk_analysis = self._structured_result(risk_analysis_result, "risk_analysis").model_dump()
+        else:
+            risk_analysis = {field: [] for field in RiskAnalysis.model_fields}
+
+        # Only return the updated keys; this node runs in parallel with the final analysis
+        return {
+            "risk_analysis": risk_analysis,
+            "risk_analysis_str": orjson.dumps(risk_analysis).decode()
+        }
 
-            Please analyze the semantic differences between these documents. Focus on:
-            1. Changes in defined terms
-            2. Changes in obligations for each party
-            3. Changes in conditions or requirements
+    async def _summary_generation(self, state: ContractComparisonState) -> Dict[str, Any]:
+        """
+        Generate a summary of the changes and risks.
 
-            Format your response as a JSON object with the following structure:
-            ```json
-            {{
-                "term_changes": [{{"term": "term_name", "old_definition": "old_def", "new_definition": "new_def"}}],
-                "obligation_changes": [{{"party": "party_name", "old_obligation": "old_obl", "new_obligation": "new_obl"}}],
-                "condition_changes": [{{"condition": "condition_name", "old_text": "old_text", "new_text": "new_text"}}]
-            }}
-            ```
+        Args:
+            state: The current state
 
-            Only include the JSON in your response, no other text."""
-        )
+        Returns:
+            The updated state
+        """
+        if self._has_changes(state):
+            summary = await self._invoke_cached(self._summary_chain, "summary_generation", {
+                "final_comparison": state["final_comparison_str"],
+                "risk_analysis": state["risk_analysis_str"]
+            })
+        else:
+            summary = NO_CHANGES_SUMMARY
+
+        # Only return the updated key; the documents are not copied into a new state
+        return {"summary": summary}
+
+    def _structured_result(self, result: Optional[BaseModel], step: str) -> BaseModel:
+        """
+        Check that a structured output step produced a result.
 
-        semantic_comparison_chain = semantic_comparison_prompt | self.llm | StrOutputParser()
-        semantic_result = semantic_comparison_chain.invoke({"doc1": doc1, "doc2": doc2})
+        Args:
+            result: The output of the step's chain
+            step: Name of the step, for the error message
 
-        # Parse the result
-        try:
-            # Check if the result contains a JSON code block
-            if "```json" in semantic_result:
-                # Extract the JSON part
-                json_part = semantic_result.split("```json")[1].split("```")[0].strip()
-                semantic_analysis = json.loads(json_part)
-            else:
-                semantic_analysis = json.loads(semantic_result)
-        except json.JSONDecodeError:
-            semantic_analysis = {"error": "Failed to parse semantic analysis result", "raw_result": semantic_result}
+        Returns:
+            The result
 
-        # Update the state
-        return {**state, "semantic_comparison": semantic_analysis}
+        Raises:
+            RuntimeError: If the model answered without calling the output schema tool,
+                in which case the structured output chain returns None
+        """
+        if result is None:
+            raise RuntimeError(f"The model returned no structured output for the {step} step")
+        return result
 
-    def _final_analysis(self, state: ContractComparisonState) -> ContractComparisonState:
+    def _has_changes(self, state: ContractComparisonState) -> bool:
         """
-        Perform final analysis on the documents.
+        Check whether the structural or semantic analysis found any change.
 
         Args:
             state: The current state
 
         Returns:
-            The updated state
+            True if either analysis reported at least one change
         """
-        structural_result = state["structural_comparison"]
-        semantic_result = state["semantic_comparison"]
-
-        # Convert to string if they are dictionaries
-        structural_str = json.dumps(structural_result) if isinstance(structural_result, dict) else str(structural_result)
-        semantic_str = json.dumps(semantic_result) if isinstance(semantic_result, dict) else str(semantic_result)
+        return any(
+            items
+            for comparison in (state["structural_comparison"], state["semantic_comparison"])
+            for items in comparison.values()
+        )
 
-        # Create the final comparison prompt
-        final_comparison_prompt = ChatPromptTemplate.from_template(
-            """You are a legal document analysis expert.
-            I have performed structural and semantic analyses of two versions of a legal document.
+    async def _invoke_cached(self, chain: Runnable, step: str, inputs: Dict[str, str]) -> Any:
+        """
+        Invoke a chain, reusing its output if the step already ran on the same inputs.
 
-            # Structural Analysis:
-            {structural_comparison}
+        Args:
+            chain: The chain of the step
+            step: Name of the step, so different steps with equal inputs get distinct keys
+            inputs: The prompt inputs of the chain
 
-            # Semantic Analysis:
-            {semantic_comparison}
+        Returns:
+            The output of the chain
+        """
+        if not self.exact_cache_enabled:
+            return await chain.ainvoke(inputs)
+
+        key = content_key(self._model_id, step, *(f"{name}={value}" for name, value in sorted(inputs.items())))
+        result = _step_cache.get(key)
+        if result is None:
+            result = await chain.ainvoke(inputs)
+            _step_cache.put(key, result)
+        return result
 
-            Please provide a final comprehensive analysis of the changes between these documents. Focus on:
-            1. The most significant changes and their potential impact
-            2. An overall assessment of how substantially the document has changed
-            3. Any potential inconsistencies or issues created by the changes
+    async def awarmup(self) -> None:
+        """
+        Open the connection to the LLM API before the first run, asynchronously.
 
-            Format your response as a JSON object with the following structure:
-            ```json
-            {{
-                "significant_changes": [{{"category": "category", "description": "description", "impact": "impact"}}],
-                "overall_assessment": "text",
-                "potential_inconsistencies": [{{"description": "description", "location": "location"}}]
-            }}
-            ```
+        A one-token completion is sent past the LLM cache, so the TLS handshake and
+        connection setup are done before the first workflow step needs them. The
+        completion is billed, and wasted if the run then makes no API call.
+        """
+        # Batch jobs don't keep a connection open between requests
+        if isinstance(self.llm, BatchChatGroq):
+            return
 
-            Only include the JSON in your response, no other text."""
-        )
+        # The copy shares the client and its connection pool, but never hits the cache
+        llm = self.llm.model_copy(update={"cache": False})
+        await llm.ainvoke("Hi", max_tokens=1)
 
-        final_comparison_chain = final_comparison_prompt | self.llm | StrOutputParser()
-        final_result = final_comparison_chain.invoke({
-            "structural_comparison": structural_str,
-            "semantic_comparison": semantic_str
-        })
-
-        # Parse the result
-        try:
-            # Check if the result contains a JSON code block
-            if "```json" in final_result:
-                # Extract the JSON part
-                json_part = final_result.split("```json")[1].split("```")[0].strip()
-                final_analysis = json.loads(json_part)
-            else:
-                final_analysis = json.loads(final_result)
-        except json.JSONDecodeError:
-            final_analysis = {"error": "Failed to parse final analysis result", "raw_result": final_result}
-
-        # Update the state
-        return {**state, "final_comparison": final_analysis}
-
-    def _risk_analysis(self, state: ContractComparisonState) -> ContractComparisonState:
+    def run(self, doc1_content: str, doc2_content: str) -> Dict[str, Any]:
         """
-        Perform risk analysis on the documents.
+        Run the contract comparison workflow.
 
         Args:
-            state: The current state
+            doc1_content: Content of the first document
+            doc2_content: Content of the second document
 
         Returns:
-            The updated state
+            A dictionary containing the workflow results
         """
-        doc1 = state["doc1_content"]
-        doc2 = state["doc2_content"]
-        structural_comparison = state["structural_comparison"]
-        semantic_comparison = state["semantic_comparison"]
-        final_comparison = state["final_comparison"]
-
-        # Convert to string if they are dictionaries
-        structural_str = json.dumps(structural_comparison) if isinstance(structural_comparison, dict) else str(structural_comparison)
-        semantic_str = json.dumps(semantic_comparison) if isinstance(semantic_comparison, dict) else str(semantic_comparison)
-        final_str = json.dumps(final_comparison) if isinstance(final_comparison, dict) else str(final_comparison)
-
-        # Create the risk analysis prompt
-        risk_analysis_prompt = ChatPromptTemplate.from_template(
-            """You are a legal risk assessment expert.
-            I have two versions of a legal document and have already performed a comparison analysis.
-
-            # Document 1:
-            {doc1}
-
-            # Document 2:
-            {doc2}
-
-            # Structural Comparison:
-            {structural_comparison}
-
-            # Semantic Comparison:
-            {semantic_comparison}
-
-            # Final Comparison:
-            {final_comparison}
-
-            Please analyze the risks associated with the changes between these documents. Focus on:
-            1. Legal risks (e.g., compliance issues, regulatory concerns)
-            2. Business risks (e.g., increased liability, unfavorable terms)
-            3. Operational risks (e.g., new obligations, resource requirements)
-            4. Strategic risks (e.g., long-term implications, competitive disadvantages)
-
-            For each identified risk:
-            - Provide a clear description of the risk
-            - Explain why it's a risk
-            - Rate its severity (Low, Medium, High)
-            - Suggest potential mitigations
-
-            Format your response as a JSON object with the following structure:
-            ```json
-            {{
-                "legal_risks": [
-                    {{
-                        "description": "description",
-                        "explanation": "explanation",
-                        "severity": "severity",
-                        "mitigation": "mitigation"
-                    }}
-                ],
-                "business_risks": [...],
-                "operational_risks": [...],
-                "strategic_risks": [...]
-            }}
-            ```
-
-            Only include the JSON in your response, no other text."""
-        )
+        future = asyncio.run_coroutine_threadsafe(self.arun(doc1_content, doc2_content), _get_event_loop())
+        return future.result()
 
-        # Create and run the risk analysis chain
-        risk_analysis_chain = risk_analysis_prompt | self.llm | StrOutputParser()
-
-        risk_analysis_result = risk_analysis_chain.invoke({
-            "doc1": doc1,
-            "doc2": doc2,
-            "structural_comparison": structural_str,
-            "semantic_comparison": semantic_str,
-            "final_comparison": final_str
-        })
-
-        # Parse the result
-        try:
-            # Check if the result contains a JSON code block
-            if "```json" in risk_analysis_result:
-                # Extract the JSON part
-                json_part = risk_analysis_result.split("```json")[1].split("```")[0].strip()
-                risk_analysis = json.loads(json_part)
-            else:
-                risk_analysis = json.loads(risk_analysis_result)
-        except json.JSONDecodeError:
-            risk_analysis = {"error": "Failed to parse risk analysis result", "raw_result": risk_analysis_result}
-
-        # Update the state
-        return {**state, "risk_analysis": risk_analysis}
-
-    def _summary_generation(self, state: ContractComparisonState) -> ContractComparisonState:
+    async def arun(self, doc1_content: str, doc2_content: str) -> Dict[str, Any]:
         """
-        Generate a summary of the changes and risks.
+        Run the contract comparison workflow asynchronously.
+
+        Every node awaits its LLM call, so independent steps overlap on one event loop.
 
         Args:
-            state: The current state
+            doc1_content: Content of the first document
+            doc2_content: Content of the second document
 
         Returns:
-            The updated state
+            A dictionary containing the workflow results
         """
-        final_comparison = state["final_comparison"]
-        risk_analysis = state["risk_analysis"]
+        cache_key, result, initial_state = await self._start_run(doc1_content, doc2_content)
+        if result is not None:
+            return result
 
-        # Convert to string if they are dictionaries
-        final_str = json.dumps(final_comparison) if isinstance(final_comparison, dict) else str(final_comparison)
-        risk_analysis_str = json.dumps(risk_analysis) if isinstance(risk_analysis, dict) else str(risk_analysis)
+        # Run the workflow
+        return self._finish_run(cache_key, await self.graph.ainvoke(initial_state))
+
+    async def astream_summary(
+        self,
+        doc1_content: str,
+        doc2_content: str,
+        node_timings: Optional[Dict[str, float]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Run the contract comparison workflow and stream the summary as it is generated.
 
-        # Create the summary prompt
-        summary_prompt = ChatPromptTemplate.from_template(
-            """You are a legal document summarization expert.
-            I have two versions of a legal document and have already performed comparison and risk analyses.
+        Args:
+            doc1_content: Content of the first document
+            doc2_content: Content of the second document
+            node_timings: Filled with the duration of each node in milliseconds once the
+                workflow has run. Left empty when no node ran, e.g. for a cached result.
 
-            # Final Comparison:
-            {final_comparison}
+        Yields:
+            Chunks of the markdown summary, in order
+        """
+        cache_key, result, initial_state = await self._start_run(doc1_content, doc2_content)
+        if result is not None:
+            yield result["summary"]
+            return
+
+        # Forward the tokens produced by the summary node, and keep the final state
+        # so a streamed run fills the result cache like a regular one
+        result = None
+        streamed = False
+        async for mode, payload in self.graph.astream(initial_state, stream_mode=["messages", "values"]):
+            if mode == "values":
+                result = payload
+                continue
+            chunk, metadata = payload
+            if metadata.get("langgraph_node") == "summary_generation" and chunk.content:
+                streamed = True
+                yield chunk.content
+
+        # A summary reused from the step cache produces no tokens, so send it whole
+        if not streamed and result is not None:
+            yield result["summary"]
+
+        if result is not None:
+            result = self._finish_run(cache_key, result)
+            if node_timings is not None:
+                node_timings.update(result["node_timings"])
+
+    async def _start_run(
+        self, doc1_content: str, doc2_content: str
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[ContractComparisonState]]:
+        """
+        Look up the results of a run, or build the state the workflow graph starts from.
+
+        Args:
+            doc1_content: Content of the first document
+            doc2_content: Content of the second document
 
-            # Risk Analysis:
-            {risk_analysis}
+        Returns:
+            The result cache key (None if the cache is disabled), the results if the run
+            needs no graph run, and otherwise the initial state of the graph
+        """
+        # Identical documents always get the no-changes result, never a cached report of
+        # a pair that only matches them once whitespace is normalized
+        if doc1_content == doc2_content:
+            initial_state = self._initial_state(doc1_content, doc2_content)
+            return None, self._finish_run(None, self._unchanged_result(initial_state)), None
 
-            Please generate a comprehensive, well-structured markdown report that summarizes the changes and risks.
+        cache_key = self._result_key(doc1_content, doc2_content) if self.cache_enabled else None
+        if cache_key is not None:
+            cached = _result_cache.get(cache_key)
+            if cached is not None:
+                result = {**cached, "doc1_content": doc1_content, "doc2_content": doc2_content, "node_timings": {}}
+                return cache_key, result, None
 
-            The report should include:
+        # Splitting and diffing large documents is CPU-bound, so keep it off the event loop
+        initial_state = await asyncio.to_thread(self._initial_state, doc1_content, doc2_content)
 
-            1. Executive Summary
-               - Brief overview of the documents compared
-               - Summary of the most significant changes
-               - Summary of the most critical risks
+        # Documents without any changed line need no analysis
+        if not initial_state["diff_chunks"]:
+            return cache_key, self._finish_run(None, self._unchanged_result(initial_state)), None
 
-            2. Detailed Changes Analysis
-               - Structural changes (added/removed/reorganized sections)
-               - Semantic changes (terms, obligations, conditions)
-               - Impact assessment of these changes
+        return cache_key, None, initial_state
 
-            3. Risk Assessment
-               - Legal risks
-               - Business risks
-               - Operational risks
-               - Strategic risks
+    def _finish_run(self, cache_key: Optional[str], state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store the final state of a run in the result cache and build the run's results.
 
-            4. Recommendations
-               - Suggested actions to address identified risks
-               - Areas that may require further legal review
+        Args:
+            cache_key: The result cache key, or None if the result is not cached
+            state: The final state of the run
 
-            Format the report in clear, professional markdown with appropriate headings, bullet points, and emphasis where needed.
-            """
-        )
+        Returns:
+            A dictionary containing the workflow results; the diff chunks are internal to
+            the run and left out, so cached and fresh results have the same keys
+        """
+        if cache_key is not None:
+            _result_cache.put(cache_key, self._cacheable_result(state))
+        return {key: value for key, value in state.items() if key != "diff_chunks"}
 
-        # Create and run the summary chain
-        summary_chain = summary_prompt | self.llm | StrOutputParser()
+    def _result_key(self, doc1_content: str, doc2_content: str) -> str:
+        """
+        Compute the result cache key of a pair of documents compared with this workflow's model.
 
-        summary = summary_chain.invoke({
-            "final_comparison": final_str,
-            "risk_analysis": risk_analysis_str
-        })
+        Args:
+            doc1_content: Content of the first document
+            doc2_content: Content of the second document
 
-        # Update the state
-        return {**state, "summary": summary}
+        Returns:
+            A hex digest identifying the model and the document pair
+        """
+        return content_key(self._model_id, document_pair_key(doc1_content, doc2_content))
 
-    def run(self, doc1_content: str, doc2_content: str) -> Dict[str, Any]:
+    def _cacheable_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Run the contract comparison workflow.
+        Strip the documents and their diff from a result before it is cached.
+
+        Args:
+            result: The final state of a workflow run
+
+        Returns:
+            The part of the result worth keeping in the result cache
+        """
+        return {key: value for key, value in result.items() if key not in _UNCACHED_STATE_KEYS}
+
+    def _initial_state(self, doc1_content: str, doc2_content: str) -> ContractComparisonState:
+        """
+        Build the initial state for a workflow run.
 
         Args:
             doc1_content: Content of the first document
             doc2_content: Content of the second document
 
         Returns:
-            A dictionary containing the workflow results
+            The initial state
         """
-        # Initialize the state
-        initial_state = {
+        # Identical documents are detected with a single comparison, without diffing them
+        if doc1_content == doc2_content:
+            diff_chunks = []
+        else:
+            # Diff the documents once; chunks without any change are not sent to the LLM
+            chunk_pairs = split_aligned(doc1_content, doc2_content, self.max_chunk_chars)
+            diff_chunks = [diff for diff in (compute_diff(doc1, doc2) for doc1, doc2 in chunk_pairs) if diff]
+
+        return {
             "doc1_content": doc1_content,
             "doc2_content": doc2_content,
+            "diff_chunks": diff_chunks,
             "structural_comparison": {},
             "semantic_comparison": {},
             "final_comparison": {},
             "risk_analysis": {},
-            "summary": ""
+            "structural_comparison_str": "",
+            "semantic_comparison_str": "",
+            "final_comparison_str": "",
+            "risk_analysis_str": "",
+            "summary": "",
+            "node_timings": {}
         }
 
-        # Run the workflow
-        result = self.graph.invoke(initial_state)
+    def _unchanged_result(self, initial_state: ContractComparisonState) -> Dict[str, Any]:
+        """
+        Build the workflow results for documents that have no changes, without any LLM call.
 
-        return result
+        Args:
+            initial_state: The initial state of the run
+
+        Returns:
+            A dictionary containing the workflow results
+        """
+        return {
+            **initial_state,
+            "structural_comparison": {field: [] for field in StructuralComparison.model_fields},
+            "semantic_comparison": {field: [] for field in SemanticComparison.model_fields},
+            "final_comparison": {
+                "significant_changes": [],
+                "overall_assessment": "No textual differences were found between the documents.",
+                "potential_inconsistencies": []
+            },
+            "risk_analysis": {field: [] for field in RiskAnalysis.model_fields},
+            "summary": UNCHANGED_SUMMARY
+        }
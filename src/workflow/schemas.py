@@ -0,0 +1,92 @@
+"""
+Structured Output Schemas
+
+This module defines the Pydantic models the LLM is bound to for each analysis step
+of the contract comparison workflow.
+"""
+
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class SectionChange(BaseModel):
+    """A section that was added to or removed from the document."""
+    section: str = Field(description="Name or heading of the section")
+    content: str = Field(description="Content of the section")
+
+
+class ReorganizedSection(BaseModel):
+    """A section that moved to a different place in the document."""
+    old_section: str = Field(description="Name or position of the section in Document 1")
+    new_section: str = Field(description="Name or position of the section in Document 2")
+
+
+class StructuralComparison(BaseModel):
+    """Structural differences between two versions of a document."""
+    added_sections: List[SectionChange] = Field(description="Sections in Document 2 that weren't in Document 1")
+    removed_sections: List[SectionChange] = Field(description="Sections in Document 1 that aren't in Document 2")
+    reorganized_sections: List[ReorganizedSection] = Field(description="Sections that moved to different places")
+
+
+class TermChange(BaseModel):
+    """A change in the definition of a term."""
+    term: str
+    old_definition: str
+    new_definition: str
+
+
+class ObligationChange(BaseModel):
+    """A change in the obligations of a party."""
+    party: str
+    old_obligation: str
+    new_obligation: str
+
+
+class ConditionChange(BaseModel):
+    """A change in a condition or requirement."""
+    condition: str
+    old_text: str
+    new_text: str
+
+
+class SemanticComparison(BaseModel):
+    """Semantic differences between two versions of a document."""
+    term_changes: List[TermChange] = Field(description="Changes in defined terms")
+    obligation_changes: List[ObligationChange] = Field(description="Changes in obligations for each party")
+    condition_changes: List[ConditionChange] = Field(description="Changes in conditions or requirements")
+
+
+class SignificantChange(BaseModel):
+    """A significant change and its potential impact."""
+    category: str
+    description: str
+    impact: str
+
+
+class Inconsistency(BaseModel):
+    """A potential inconsistency or issue created by the changes."""
+    description: str
+    location: str
+
+
+class FinalComparison(BaseModel):
+    """Comprehensive analysis of the changes between two versions of a document."""
+    significant_changes: List[SignificantChange] = Field(description="The most significant changes and their potential impact")
+    overall_assessment: str = Field(description="How substantially the document has changed")
+    potential_inconsistencies: List[Inconsistency] = Field(description="Inconsistencies or issues created by the changes")
+
+
+class Risk(BaseModel):
+    """A risk introduced by the changes."""
+    description: str = Field(description="Clear description of the risk")
+    explanation: str = Field(description="Why it is a risk")
+    severity: str = Field(description="Severity of the risk: Low, Medium or High")
+    mitigation: str = Field(description="Potential mitigations")
+
+
+class RiskAnalysis(BaseModel):
+    """Risks associated with the changes between two versions of a document."""
+    legal_risks: List[Risk] = Field(description="Compliance issues, regulatory concerns")
+    business_risks: List[Risk] = Field(description="Increased liability, unfavorable terms")
+    operational_risks: List[Risk] = Field(description="New obligations, resource requirements")
+    strategic_risks: List[Risk] = Field(description="Long-term implications, competitive disadvantages")
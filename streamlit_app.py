@@ -7,16 +7,22 @@ generating a detailed summary of changes and potential risk areas using LangGrap
 """
 
 import os
+import re
+import hashlib
 import tempfile
 import io
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
 import streamlit as st
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from src.document_loaders.loader import DocumentLoader
 from src.workflow.contract_comparison_workflow import ContractComparisonWorkflow
 
+# Markdown headings and horizontal rules in the generated summary
+_HEADING_RE = re.compile(r'^(#+)(.*)$', re.MULTILINE)
+_RULE_RE = re.compile(r'^\s*-{3,}\s*$')
+
 # Note: We're using Streamlit secrets instead of environment variables
 # for deployment on Streamlit Cloud
 
@@ -29,7 +35,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown("""
+_CUSTOM_CSS = """
 <style>
     .main {
         padding: 2rem;
@@ -69,17 +75,27 @@ st.markdown("""
         overflow-y: auto;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Introduction shown under the title
+_INTRO_TEXT = """
+Upload two versions of a contract to compare them, identify changes and potential risks.
+The tool will analyze structural and semantic differences and provide a detailed report.
+"""
+
+# Streamlit drops every element that a rerun does not render again, so the
+# CSS has to be emitted on each run rather than once per session
+st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 def check_api_key():
-    """Check if the GROQ API key is set in Streamlit secrets or prompt the user for it."""
+    """Get the GROQ API key from Streamlit secrets or prompt the user for it, returning None if it is not set."""
     # Try to get the API key from Streamlit secrets
     try:
         api_key = st.secrets["api_keys"]["groq"]
         if api_key and api_key != "your_groq_api_key_here":
             # Set the environment variable for any libraries that use it
             os.environ["GROQ_API_KEY"] = api_key
-            return True
+            return api_key
     except (KeyError, TypeError):
         # If the key is not in secrets or has the default value, continue to the input prompt
         pass
@@ -89,32 +105,109 @@ def check_api_key():
     api_key = st.text_input("Enter your GROQ API key:", type="password")
     if api_key:
         os.environ["GROQ_API_KEY"] = api_key
-        return True
-    return False
-
-def save_uploaded_file(uploaded_file):
-    """Save an uploaded file to a temporary file and return the path."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-        tmp.write(uploaded_file.getvalue())
+        return api_key
+    return None
+
+@st.cache_resource
+def get_loader():
+    """Get the document loader shared by every session of the app."""
+    # Uploaded contracts are not written to a disk cache shared by every session
+    return DocumentLoader(cache_dir=None)
+
+@st.cache_resource
+def get_workflow(api_key):
+    """Get the comparison workflow shared by every session using the same API key, so its chains and graph are built once."""
+    return ContractComparisonWorkflow(api_key=api_key)
+
+def save_uploaded_file(file_bytes, suffix):
+    """Save the content of an uploaded file to a temporary file and return the path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(file_bytes)
         return tmp.name
 
-def format_comparison_results(result):
-    """Format the comparison results for display."""
-    summary = result.get("summary", "")
-
-    # Extract different sections from the summary
-    sections = {}
-    current_section = "Executive Summary"
-    sections[current_section] = []
+@st.cache_data(show_spinner=False)
+def load_uploaded_document(file_bytes, suffix):
+    """Extract the text of an uploaded file, reusing it when the same file is uploaded again."""
+    path = save_uploaded_file(file_bytes, suffix)
+    try:
+        return get_loader().load_document(path)
+    finally:
+        os.unlink(path)
+
+@st.cache_data(show_spinner=False)
+def load_sample_document(path):
+    """Extract the text of a sample document once per path."""
+    return get_loader().load_document(path)
+
+def load_in_parallel(load, doc1_args, doc2_args):
+    """Load two documents on two threads, so one is parsed while the other waits on I/O."""
+    # Attach the script context to the workers so the cached loaders can run in them
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, ctx)) as executor:
+        doc1_future = executor.submit(load, *doc1_args)
+        doc2_future = executor.submit(load, *doc2_args)
+        return doc1_future.result(), doc2_future.result()
+
+def process_summary(summary):
+    """Separate the main sections of the summary with horizontal rules for display."""
+    # Define the main section headings we want to separate
+    main_sections = ["Executive Summary", "Detailed Changes Analysis", "Risk Assessment", "Recommendations"]
+
+    # Process the summary to identify main sections and their content
+    processed_content = []
+    current_main_section = None
 
     for line in summary.split('\n'):
+        # Check if this is a main section heading
         if line.startswith('##'):
-            current_section = line.replace('#', '').strip()
-            sections[current_section] = []
+            section_name = line.replace('#', '').strip()
+
+            # If we're starting a new main section and already have content
+            if section_name in main_sections:
+                # If we already have content and are starting a new main section, add a separator
+                if processed_content and current_main_section:
+                    processed_content.append("\n---\n")
+                current_main_section = section_name
+
+            # Add the heading (without any horizontal line after it)
+            processed_content.append(line)
         else:
-            sections[current_section].append(line)
+            # Skip horizontal lines that might appear after headings
+            if line.strip() == '---' or line.strip() == '---------------':
+                continue
+
+            # Add regular content
+            processed_content.append(line)
+
+    return '\n'.join(processed_content)
+
+def render_change_groups(changes):
+    """Display significant changes grouped by their category."""
+    # Group changes by category
+    changes_by_category = defaultdict(list)
+    for change in changes:
+        changes_by_category[change.get("category", "Other")].append(change)
 
-    return sections
+    # Display each category in its own section
+    for category, category_changes in changes_by_category.items():
+        st.markdown(f"#### {category} Changes")
+
+        # Create a clean list of changes
+        for i, change in enumerate(category_changes):
+            description = change.get("description", "")
+            impact = change.get("impact", "")
+
+            # Create a container for each change
+            with st.container():
+                # Add a subtle divider between changes
+                if i > 0:
+                    st.divider()
+
+                # Display description with bold label
+                st.markdown(f"**Description:** {description}")
+
+                # Display impact with bold label and emphasis
+                st.markdown(f"**Impact:** *{impact}*")
 
 def create_risk_table(risk_analysis):
     """Create a formatted risk table from the risk analysis."""
@@ -123,22 +216,28 @@ def create_risk_table(risk_analysis):
         return "No risks identified."
 
     # Create a table header
-    table = """
-    | Risk | Severity | Description | Mitigation |
-    | ---- | -------- | ----------- | ---------- |
-    """
+    rows = [
+        "| Risk | Severity | Description | Mitigation |",
+        "| ---- | -------- | ----------- | ---------- |"
+    ]
 
     # Add each risk to the table
     for risk in risks:
         severity = risk.get("severity", "").lower()
         severity_class = f"risk-{severity}" if severity in ["high", "medium", "low"] else ""
 
-        table += f"| {risk.get('category', '')} | <span class='{severity_class}'>{risk.get('severity', '')}</span> | {risk.get('description', '')} | {risk.get('mitigation', '')} |\n"
+        rows.append(f"| {risk.get('category', '')} | <span class='{severity_class}'>{risk.get('severity', '')}</span> | {risk.get('description', '')} | {risk.get('mitigation', '')} |")
 
-    return table
+    return "\n".join(rows)
 
 def generate_pdf_report(summary):
     """Generate a PDF report from the summary markdown."""
+    # ReportLab is only imported once a PDF is requested, to keep it out of the app's start-up
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
     # Create a buffer for the PDF
     buffer = io.BytesIO()
 
@@ -165,65 +264,37 @@ def generate_pdf_report(summary):
     # Create the content elements
     elements = []
 
-    # Parse the markdown content
-    lines = summary.split('\n')
-
     # Add the title (first line)
-    if lines:
-        title_text = lines[0].replace('#', '').strip()
-        elements.append(Paragraph(title_text, title_style))
-        elements.append(Spacer(1, 12))
-
-    # Process the rest of the content
-    current_section = None
-    section_content = []
-
-    for line in lines[1:]:
-        # Check if this is a section heading
-        if line.startswith('##'):
-            # If we have content from a previous section, add it
-            if current_section and section_content:
-                elements.append(Paragraph(current_section, section_title_style))
-
-                # Add the section content
-                for content in section_content:
-                    if content.strip():
-                        elements.append(Paragraph(content, normal_style))
-                        elements.append(Spacer(1, 6))
-
-                # Add a spacer between sections
-                elements.append(Spacer(1, 12))
-
-                # Reset for the new section
-                section_content = []
-
-            # Set the new section title
-            current_section = line.replace('#', '').strip()
-
-        # Check if this is a subsection heading
-        elif line.startswith('#'):
-            # Add the subsection heading
-            heading_text = line.replace('#', '').strip()
-            elements.append(Paragraph(heading_text, heading_style))
-
-        # Skip horizontal lines
-        elif line.strip() == '---' or line.strip() == '---------------':
-            continue
-
-        # Regular content
+    title_line, _, body = summary.partition('\n')
+    elements.append(Paragraph(title_line.replace('#', '').strip(), title_style))
+    elements.append(Spacer(1, 12))
+
+    # Walk the headings of the rest of the content in one pass; text before the
+    # first heading does not belong to any section and is skipped
+    headings = list(_HEADING_RE.finditer(body))
+    for index, match in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(body)
+        title = match.group(2).replace('#', '').strip()
+        section_content = [
+            line for line in body[match.end():end].split('\n')
+            if line.strip() and not _RULE_RE.match(line)
+        ]
+
+        # A single "#" marks a subsection heading
+        if len(match.group(1)) == 1:
+            elements.append(Paragraph(title, heading_style))
+        # Sections without any content are left out
+        elif section_content:
+            elements.append(Paragraph(title, section_title_style))
         else:
-            if current_section:
-                section_content.append(line)
+            continue
 
-    # Add the last section if there is one
-    if current_section and section_content:
-        elements.append(Paragraph(current_section, section_title_style))
+        # Add the section content as a single paragraph, so layout runs once per section
+        if section_content:
+            elements.append(Paragraph("<br/>".join(escape(line) for line in section_content), normal_style))
 
-        # Add the section content
-        for content in section_content:
-            if content.strip():
-                elements.append(Paragraph(content, normal_style))
-                elements.append(Spacer(1, 6))
+        # Add a spacer between sections
+        elements.append(Spacer(1, 12))
 
     try:
         # Build the PDF
@@ -239,16 +310,19 @@ def generate_pdf_report(summary):
         print(f"Error generating PDF: {e}")
         return None
 
+@st.cache_data(show_spinner=False)
+def cached_pdf_report(summary):
+    """Generate the PDF report of a summary once, instead of on every rerun."""
+    return generate_pdf_report(summary)
+
 def main():
     """Main function for the Streamlit app."""
     st.title("📄 AI-Powered Contract Comparison")
-    st.markdown("""
-    Upload two versions of a contract to compare them, identify changes and potential risks.
-    The tool will analyze structural and semantic differences and provide a detailed report.
-    """)
+    st.markdown(_INTRO_TEXT)
 
     # Check if API key is set
-    if not check_api_key():
+    api_key = check_api_key()
+    if not api_key:
         st.warning("Please set your GROQ API key to continue.")
         return
 
@@ -293,31 +367,34 @@ def main():
     if process_clicked:
         try:
             with st.spinner("Processing documents... This may take a minute."):
-                loader = DocumentLoader()
-
                 if use_samples:
                     # Use sample documents with the selected format
                     file_ext = sample_format.lower()
-                    doc1_path = f"data/sample_documents/contract_v1.{file_ext}"
-                    doc2_path = f"data/sample_documents/contract_v2.{file_ext}"
-                    doc1_content = loader.load_document(doc1_path)
-                    doc2_content = loader.load_document(doc2_path)
+                    doc1_content, doc2_content = load_in_parallel(
+                        load_sample_document,
+                        (f"data/sample_documents/contract_v1.{file_ext}",),
+                        (f"data/sample_documents/contract_v2.{file_ext}",)
+                    )
                     doc1_name = f"contract_v1.{file_ext}"
                     doc2_name = f"contract_v2.{file_ext}"
                 else:
-                    # Save uploaded files to temporary files
-                    doc1_path = save_uploaded_file(doc1)
-                    doc2_path = save_uploaded_file(doc2)
-
-                    # Load documents
-                    doc1_content = loader.load_document(doc1_path)
-                    doc2_content = loader.load_document(doc2_path)
+                    # Load documents; files that were already parsed are served from the cache
+                    doc1_bytes, doc1_ext = doc1.getvalue(), os.path.splitext(doc1.name)[1]
+                    doc2_bytes, doc2_ext = doc2.getvalue(), os.path.splitext(doc2.name)[1]
+
+                    # The same file uploaded twice is not parsed again; the workflow
+                    # returns its no-changes result for identical texts without any LLM call
+                    if doc1_bytes == doc2_bytes and doc1_ext == doc2_ext:
+                        doc1_content = doc2_content = load_uploaded_document(doc1_bytes, doc1_ext)
+                    else:
+                        doc1_content, doc2_content = load_in_parallel(
+                            load_uploaded_document, (doc1_bytes, doc1_ext), (doc2_bytes, doc2_ext)
+                        )
                     doc1_name = doc1.name
                     doc2_name = doc2.name
 
-                # Run the workflow
-                workflow = ContractComparisonWorkflow()
-                result = workflow.run(doc1_content, doc2_content)
+                # Run the workflow; it reuses its own cached result when the same documents are compared again
+                result = get_workflow(api_key).run(doc1_content, doc2_content)
 
                 # Store the result in session state
                 st.session_state.comparison_result = result
@@ -326,11 +403,6 @@ def main():
                 st.session_state.doc1_name = doc1_name
                 st.session_state.doc2_name = doc2_name
 
-                # Clean up temporary files if not using samples
-                if not use_samples:
-                    os.unlink(doc1_path)
-                    os.unlink(doc2_path)
-
                 st.success("Comparison completed successfully!")
 
         except Exception as e:
@@ -348,37 +420,14 @@ def main():
             # Display summary with custom formatting
             summary = st.session_state.comparison_result.get("summary", "")
 
-            # Define the main section headings we want to separate
-            main_sections = ["Executive Summary", "Detailed Changes Analysis", "Risk Assessment", "Recommendations"]
-
-            # Process the summary to identify main sections and their content
-            processed_content = []
-            current_main_section = None
-
-            for line in summary.split('\n'):
-                # Check if this is a main section heading
-                if line.startswith('##'):
-                    section_name = line.replace('#', '').strip()
-
-                    # If we're starting a new main section and already have content
-                    if section_name in main_sections:
-                        # If we already have content and are starting a new main section, add a separator
-                        if processed_content and current_main_section:
-                            processed_content.append("\n---\n")
-                        current_main_section = section_name
-
-                    # Add the heading (without any horizontal line after it)
-                    processed_content.append(line)
-                else:
-                    # Skip horizontal lines that might appear after headings
-                    if line.strip() == '---' or line.strip() == '---------------':
-                        continue
-
-                    # Add regular content
-                    processed_content.append(line)
+            # Reuse the processed summary on reruns that don't change it, e.g. tab switches
+            summary_key = hashlib.blake2b(summary.encode("utf-8"), digest_size=16).hexdigest()
+            if st.session_state.get("_processed_summary_key") != summary_key:
+                st.session_state._processed_summary = process_summary(summary)
+                st.session_state._processed_summary_key = summary_key
 
             # Display the processed content
-            st.markdown('\n'.join(processed_content))
+            st.markdown(st.session_state._processed_summary)
 
         with tab2:
             # Create expandable sections for each part of the analysis
@@ -409,20 +458,15 @@ def main():
                 # Display modified sections in full width
                 st.subheader("Modified Sections")
                 if "modified_sections" in structural_comparison and structural_comparison["modified_sections"]:
-                    # Create a table-like display for modified sections
+                    # Create a table-like display for modified sections, sent as a single element
+                    cards = []
                     for i, section in enumerate(structural_comparison.get("modified_sections", [])):
-                        if i % 2 == 0:
-                            st.markdown(f"""
-                            <div style="background-color: #f8f9fa; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                                <strong>{section}</strong>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        else:
-                            st.markdown(f"""
-                            <div style="background-color: #e9ecef; padding: 10px; border-radius: 5px; margin-bottom: 10px;">
-                                <strong>{section}</strong>
-                            </div>
-                            """, unsafe_allow_html=True)
+                        background = "#f8f9fa" if i % 2 == 0 else "#e9ecef"
+                        cards.append(
+                            f'<div style="background-color: {background}; padding: 10px; border-radius: 5px; margin-bottom: 10px;">'
+                            f'<strong>{section}</strong></div>'
+                        )
+                    st.markdown("".join(cards), unsafe_allow_html=True)
                 else:
                     st.info("No sections were modified")
 
@@ -437,34 +481,7 @@ def main():
                 if "significant_changes" in semantic_comparison and semantic_comparison["significant_changes"]:
                     st.subheader("Significant Changes")
 
-                    # Group changes by category
-                    changes_by_category = {}
-                    for change in semantic_comparison.get("significant_changes", []):
-                        category = change.get("category", "Other")
-                        if category not in changes_by_category:
-                            changes_by_category[category] = []
-                        changes_by_category[category].append(change)
-
-                    # Display each category in its own section
-                    for category, changes in changes_by_category.items():
-                        st.markdown(f"#### {category} Changes")
-
-                        # Create a clean list of changes
-                        for i, change in enumerate(changes):
-                            description = change.get("description", "")
-                            impact = change.get("impact", "")
-
-                            # Create a container for each change
-                            with st.container():
-                                # Add a subtle divider between changes
-                                if i > 0:
-                                    st.divider()
-
-                                # Display description with bold label
-                                st.markdown(f"**Description:** {description}")
-
-                                # Display impact with bold label and emphasis
-                                st.markdown(f"**Impact:** *{impact}*")
+                    render_change_groups(semantic_comparison.get("significant_changes", []))
                 else:
                     st.info("No significant semantic changes identified")
 
@@ -496,34 +513,7 @@ def main():
                 if "significant_changes" in final_comparison and final_comparison["significant_changes"]:
                     st.subheader("Significant Changes")
 
-                    # Group changes by category
-                    changes_by_category = {}
-                    for change in final_comparison.get("significant_changes", []):
-                        category = change.get("category", "Other")
-                        if category not in changes_by_category:
-                            changes_by_category[category] = []
-                        changes_by_category[category].append(change)
-
-                    # Display each category in its own section
-                    for category, changes in changes_by_category.items():
-                        st.markdown(f"#### {category} Changes")
-
-                        # Create a clean list of changes
-                        for i, change in enumerate(changes):
-                            description = change.get("description", "")
-                            impact = change.get("impact", "")
-
-                            # Create a container for each change
-                            with st.container():
-                                # Add a subtle divider between changes
-                                if i > 0:
-                                    st.divider()
-
-                                # Display description with bold label
-                                st.markdown(f"**Description:** {description}")
-
-                                # Display impact with bold label and emphasis
-                                st.markdown(f"**Impact:** *{impact}*")
+                    render_change_groups(final_comparison.get("significant_changes", []))
 
                 # Display potential inconsistencies in a more readable format
                 if "potential_inconsistencies" in final_comparison and final_comparison["potential_inconsistencies"]:
@@ -548,28 +538,38 @@ def main():
         st.markdown("---")
         _, center_col, _ = st.columns([1, 2, 1])
         with center_col:
-            # Try to generate PDF
             summary = st.session_state.comparison_result.get("summary", "")
-            pdf_data = generate_pdf_report(summary)
-
-            if pdf_data:
-                # If PDF generation was successful, offer PDF download
-                st.download_button(
-                    label="Download Comparison Report (PDF)",
-                    data=pdf_data,
-                    file_name="comparison_report.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
+            summary_key = st.session_state._processed_summary_key
+
+            # The markdown report is always available
+            st.download_button(
+                label="Download Comparison Report (Markdown)",
+                data=summary,
+                file_name="comparison_report.md",
+                mime="text/markdown",
+                use_container_width=True
+            )
+
+            # The PDF is only built once the user asks for it; the click reruns the
+            # script so the button is replaced by the download instead of staying on screen
+            if st.session_state.get("_pdf_summary_key") != summary_key:
+                if st.button("Prepare PDF Report", use_container_width=True):
+                    st.session_state._pdf_summary_key = summary_key
+                    st.rerun()
             else:
-                # Fallback to markdown if PDF generation failed
-                st.download_button(
-                    label="Download Comparison Report (Markdown)",
-                    data=summary,
-                    file_name="comparison_report.md",
-                    mime="text/markdown",
-                    use_container_width=True
-                )
+                pdf_data = cached_pdf_report(summary)
+
+                if pdf_data:
+                    # If PDF generation was successful, offer PDF download
+                    st.download_button(
+                        label="Download Comparison Report (PDF)",
+                        data=pdf_data,
+                        file_name="comparison_report.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
+                else:
+                    st.warning("The PDF report could not be generated; please use the markdown report.")
 
 if __name__ == "__main__":
     main()
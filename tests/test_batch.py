@@ -0,0 +1,88 @@
+"""
+Tests for the Groq Batch API chat model.
+"""
+
+import asyncio
+import unittest
+from unittest import mock
+import orjson
+from langchain_core.messages import HumanMessage
+from src.workflow.batch import BatchChatGroq
+
+
+# A chat completion response body as returned in a batch output file
+_RESPONSE_BODY = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "model": "test-model",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class BatchChatGroqTest(unittest.TestCase):
+    """Run BatchChatGroq end to end with the batch job itself stubbed out."""
+
+    def setUp(self):
+        self.llm = BatchChatGroq(model="test-model", api_key="test-key", batch_delay=0.01)
+
+    def test_invoke_returns_batch_response(self):
+        with mock.patch.object(BatchChatGroq, "_submit_batch", return_value=[_RESPONSE_BODY]) as submit:
+            message = self.llm.invoke([HumanMessage(content="Hi")])
+
+        self.assertEqual(message.content, "Hello")
+        body = submit.call_args.args[0][0]
+        self.assertEqual(body["messages"], [{"role": "user", "content": "Hi"}])
+        self.assertNotIn("stream", body)
+
+    def test_ainvoke_returns_batch_response(self):
+        with mock.patch.object(BatchChatGroq, "_submit_batch", return_value=[_RESPONSE_BODY]):
+            message = asyncio.run(self.llm.ainvoke([HumanMessage(content="Hi")]))
+
+        self.assertEqual(message.content, "Hello")
+
+    def test_concurrent_requests_share_one_batch_job(self):
+        async def invoke_all():
+            return await self.llm.abatch([[HumanMessage(content="Hi")], [HumanMessage(content="Hey")]])
+
+        with mock.patch.object(BatchChatGroq, "_submit_batch", return_value=[_RESPONSE_BODY] * 2) as submit:
+            messages = asyncio.run(invoke_all())
+
+        self.assertEqual([message.content for message in messages], ["Hello", "Hello"])
+        submit.assert_called_once()
+        self.assertEqual(len(submit.call_args.args[0]), 2)
+
+    def test_failed_request_raises_for_its_caller(self):
+        error = RuntimeError("request 0 failed")
+        with mock.patch.object(BatchChatGroq, "_submit_batch", return_value=[error]):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(self.llm.ainvoke([HumanMessage(content="Hi")]))
+
+    def test_submit_batch_maps_results_by_custom_id(self):
+        output = orjson.dumps({"custom_id": "request-1", "response": {"status_code": 200, "body": _RESPONSE_BODY}})
+        errors = orjson.dumps({"custom_id": "request-0", "error": {"message": "rate limited"}})
+        client = mock.Mock()
+        client.batches.create.return_value = mock.Mock(
+            id="batch-1", status="completed", output_file_id="out", error_file_id="err"
+        )
+        client.files.content.side_effect = lambda file_id: mock.Mock(
+            read=mock.Mock(return_value=output if file_id == "out" else errors)
+        )
+
+        with mock.patch("src.workflow.batch.Groq", return_value=client):
+            responses = self.llm._submit_batch([{"messages": []}, {"messages": []}])
+
+        self.assertIsInstance(responses[0], RuntimeError)
+        self.assertEqual(responses[1], _RESPONSE_BODY)
+        submitted = client.files.create.call_args.kwargs["file"][1].splitlines()
+        self.assertEqual([orjson.loads(line)["custom_id"] for line in submitted], ["request-0", "request-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+"""
+Tests for the aligned document chunking.
+"""
+
+import unittest
+from src.comparison.chunking import split_aligned
+
+
+class SplitAlignedTest(unittest.TestCase):
+    """Split long documents made of repeated boilerplate lines."""
+
+    def setUp(self):
+        # Blank lines and a repeated sentence make up most of the document
+        self.doc1 = "".join(f"Clause {i}. The party shall comply.\n\n" for i in range(20000))
+        self.doc2 = self.doc1.replace("Clause 500.", "Clause 500 amended.")
+
+    def test_chunks_rebuild_both_documents(self):
+        pairs = split_aligned(self.doc1, self.doc2, max_chars=32000)
+
+        self.assertGreater(len(pairs), 1)
+        self.assertEqual("".join(chunk1 for chunk1, _ in pairs), self.doc1)
+        self.assertEqual("".join(chunk2 for _, chunk2 in pairs), self.doc2)
+
+    def test_change_falls_within_one_pair(self):
+        pairs = split_aligned(self.doc1, self.doc2, max_chars=32000)
+
+        changed = [(chunk1, chunk2) for chunk1, chunk2 in pairs if chunk1 != chunk2]
+        self.assertEqual(len(changed), 1)
+        self.assertIn("Clause 500.", changed[0][0])
+        self.assertIn("Clause 500 amended.", changed[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Tests for the contract comparison workflow, with every LLM step stubbed out.
+"""
+
+import asyncio
+import unittest
+import httpx
+from langchain_core.runnables import RunnableLambda
+from src.workflow.contract_comparison_workflow import (
+    ContractComparisonWorkflow, NO_CHANGES_SUMMARY, UNCHANGED_SUMMARY, _LoopLocalAsyncClient, _result_cache
+)
+from src.workflow.schemas import StructuralComparison, SemanticComparison, FinalComparison, RiskAnalysis
+
+
+DOC1 = "1. Payment\nPayment is due within 30 days.\n"
+DOC2 = "1. Payment\nPayment is due within 60 days.\n"
+
+
+def _stub_chain(calls, step, output):
+    """Build a chain that records each call of a step and returns a fixed output."""
+    def invoke(inputs):
+        calls.append(step)
+        return output
+    return RunnableLambda(invoke)
+
+
+class WorkflowTest(unittest.TestCase):
+    """Run the workflow graph with stub chains in place of the LLM."""
+
+    def setUp(self):
+        self.calls = []
+        self.workflow = ContractComparisonWorkflow(api_key="test-key", cache_enabled=False, exact_cache_enabled=False)
+        self.workflow._structural_chain = _stub_chain(self.calls, "structural", StructuralComparison(
+            added_sections=[], removed_sections=[], reorganized_sections=[]
+        ))
+        self.workflow._semantic_chain = _stub_chain(self.calls, "semantic", SemanticComparison(
+            term_changes=[], obligation_changes=[],
+            condition_changes=[{"condition": "Payment", "old_text": "30 days", "new_text": "60 days"}]
+        ))
+        self.workflow._final_chain = _stub_chain(self.calls, "final", FinalComparison(
+            significant_changes=[], overall_assessment="Minor", potential_inconsistencies=[]
+        ))
+        self.workflow._risk_chain = _stub_chain(self.calls, "risk", RiskAnalysis(
+            legal_risks=[], business_risks=[], operational_risks=[], strategic_risks=[]
+        ))
+        self.workflow._summary_chain = _stub_chain(self.calls, "summary", "# Summary")
+
+    def _stream(self, node_timings=None):
+        async def collect():
+            return [chunk async for chunk in self.workflow.astream_summary(DOC1, DOC2, node_timings=node_timings)]
+        return "".join(asyncio.run(collect()))
+
+    def test_stream_reports_node_timings(self):
+        node_timings = {}
+        summary = self._stream(node_timings)
+
+        self.assertEqual(summary, "# Summary")
+        self.assertEqual(set(node_timings), {
+            "structural_analysis", "semantic_analysis", "final_analysis", "risk_analyzer", "summary_generation"
+        })
+        self.assertTrue(all(elapsed_ms >= 0 for elapsed_ms in node_timings.values()))
+
+    def test_changes_found_run_every_step(self):
+        self._stream()
+
+        self.assertEqual(sorted(self.calls), ["final", "risk", "semantic", "structural", "summary"])
+
+    def test_no_changes_found_skips_later_steps(self):
+        self.workflow._semantic_chain = _stub_chain(self.calls, "semantic", SemanticComparison(
+            term_changes=[], obligation_changes=[], condition_changes=[]
+        ))
+
+        summary = self._stream()
+
+        self.assertEqual(summary, NO_CHANGES_SUMMARY)
+        self.assertEqual(sorted(self.calls), ["semantic", "structural"])
+
+
+    def test_cached_result_has_the_same_keys(self):
+        _result_cache.clear()
+        self.workflow.cache_enabled = True
+
+        fresh = asyncio.run(self.workflow.arun(DOC1, DOC2))
+        cached = asyncio.run(self.workflow.arun(DOC1, DOC2))
+
+        self.assertEqual(set(cached), set(fresh))
+        self.assertEqual(cached["summary"], fresh["summary"])
+        self.assertEqual(self.calls.count("summary"), 1)
+
+    def test_identical_documents_skip_the_result_cache(self):
+        _result_cache.clear()
+        self.workflow.cache_enabled = True
+        # Matches the identical pair once whitespace is normalized
+        asyncio.run(self.workflow.arun(DOC1, DOC1.replace(" ", "  ")))
+
+        result = asyncio.run(self.workflow.arun(DOC1, DOC1))
+
+        self.assertEqual(result["summary"], UNCHANGED_SUMMARY)
+
+    def test_missing_structured_output_names_the_step(self):
+        self.workflow._risk_chain = _stub_chain(self.calls, "risk", None)
+
+        with self.assertRaisesRegex(RuntimeError, "risk_analysis"):
+            self._stream()
+
+
+class LoopLocalAsyncClientTest(unittest.TestCase):
+    """Share one async HTTP client between runs on different event loops."""
+
+    def test_each_event_loop_gets_its_own_pool(self):
+        client = _LoopLocalAsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok")))
+
+        async def fetch():
+            return (await client.get("http://test/")).text
+
+        self.assertEqual(asyncio.run(fetch()), "ok")
+        first_loop_clients = list(client._loop_clients.values())
+        self.assertEqual(asyncio.run(fetch()), "ok")
+
+        # The pool of the first, now closed, loop is replaced rather than reused
+        self.assertEqual(len(client._loop_clients), 1)
+        self.assertNotIn(first_loop_clients[0], client._loop_clients.values())
+
+
+if __name__ == "__main__":
+    unittest.main()